@@ -1,6 +1,7 @@
 # pip install mysql-connector-python flask flask-cors requests
 # pip install mysql-connector-python
 import mysql.connector
+import json
 import uuid
 
 # Configurar conexión (igual que en tu ejemplo)
@@ -13,6 +14,31 @@ conn = mysql.connector.connect(
 )
 cursor = conn.cursor(dictionary=True)
 
+# Fechas del change feed en ISO 8601
+def json_default(val):
+    if hasattr(val, "isoformat"):
+        return val.isoformat()
+    return str(val)
+
+# Outbox: registra el cambio en feedback_changes dentro de la misma transacción
+# (el lock de feedback_change_seq se libera en el commit, así los seq quedan en orden)
+def record_change(feedback_id, op, payload=None):
+    c = conn.cursor(buffered=True)
+    c.execute("UPDATE feedback_change_seq SET seq = LAST_INSERT_ID(seq + 1) WHERE id = 1")
+    c.execute("SELECT LAST_INSERT_ID()")
+    seq = c.fetchone()[0]
+    c.execute(
+        "INSERT INTO feedback_changes (seq, feedback_id, op, payload) VALUES (%s, %s, %s, %s)",
+        (seq, feedback_id, op, json.dumps(payload, default=json_default) if payload is not None else None)
+    )
+    c.close()
+    return seq
+
+def read_feedback(feedback_id):
+    cursor.execute("SELECT * FROM feedback_events WHERE feedback_id=%s", (feedback_id,))
+    rows = cursor.fetchall()
+    return rows[0] if rows else None
+
 # CREATE
 def create_feedback(session_id, item_type, feedback, intent, emotion,
                     item_id=None, provider="spotify", provider_playlist_id=None,
@@ -34,8 +60,13 @@ def create_feedback(session_id, item_type, feedback, intent, emotion,
     vals = [feedback_id, session_id, item_type, item_id, provider, provider_playlist_id,
             feedback, reason_code, comment, intent, emotion, confidence,
             latency_ms, retries, client_device, client_version, trace_id, supersedes_event_id]
-    cursor.execute(sql, vals)
-    conn.commit()
+    try:
+        cursor.execute(sql, vals)
+        record_change(feedback_id, "insert", read_feedback(feedback_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     return feedback_id
 
 # READ ALL
@@ -54,15 +85,29 @@ def update_feedback(feedback_id, updates: dict):
         vals.append(v)
     vals.append(feedback_id)
     sql = f"UPDATE feedback_events SET {', '.join(sets)} WHERE feedback_id=%s"
-    cursor.execute(sql, vals)
-    conn.commit()
-    return cursor.rowcount
+    try:
+        cursor.execute(sql, vals)
+        affected = cursor.rowcount
+        if affected:
+            record_change(feedback_id, "update", read_feedback(feedback_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return affected
 
 # DELETE
 def delete_feedback(feedback_id):
-    cursor.execute("DELETE FROM feedback_events WHERE feedback_id=%s", (feedback_id,))
-    conn.commit()
-    return cursor.rowcount
+    try:
+        cursor.execute("DELETE FROM feedback_events WHERE feedback_id=%s", (feedback_id,))
+        affected = cursor.rowcount
+        if affected:
+            record_change(feedback_id, "delete")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return affected
 
 # Ejemplo rápido
 if __name__ == "__main__":
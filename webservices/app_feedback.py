@@ -7,9 +7,14 @@
 #   python app_feedback.py
 # Servidor:
 #   http://127.0.0.1:8000
+#
+# Change feed (outbox): requiere las tablas feedback_change_seq y
+# feedback_changes, ver DDL en README.md ("Change feed de feedback_events").
 
 from flask import Flask, request, jsonify
 import mysql.connector
+import json
+import time
 import uuid
 
 # -----------------------------
@@ -39,6 +44,11 @@ VALID_FEEDBACK = {"like", "dislike", "skip", "save", "share", "undo"}
 VALID_INTENT = {"maintain", "change"}
 VALID_EMOTION = {"joy", "sadness", "anger"}
 
+# Change feed (long-poll)
+CHANGES_MAX_LIMIT = 500
+CHANGES_MAX_WAIT_S = 30
+CHANGES_POLL_INTERVAL_S = 0.5
+
 # -----------------------------
 # Utilidades
 # -----------------------------
@@ -75,6 +85,64 @@ def validate_confidence(val):
     if c < 0 or c > 1:
         raise ValueError("confidence debe estar entre 0 y 1")
 
+def json_default(val):
+    """Serializa fechas en ISO 8601 (formato del change feed) y el resto como str."""
+    if hasattr(val, "isoformat"):
+        return val.isoformat()
+    return str(val)
+
+def record_change(conn, feedback_id: str, op: str, payload=None):
+    """
+    Escribe un registro en el outbox feedback_changes dentro de la transacción
+    abierta en conn (no hace commit).
+
+    El seq se obtiene incrementando la fila única de feedback_change_seq; el
+    lock de esa fila se mantiene hasta el commit, por lo que los seq se hacen
+    visibles en orden y un consumidor que lee "after=<seq>" nunca salta cambios.
+    """
+    cur = conn.cursor(buffered=True)
+    cur.execute("UPDATE feedback_change_seq SET seq = LAST_INSERT_ID(seq + 1) WHERE id = 1")
+    cur.execute("SELECT LAST_INSERT_ID()")
+    seq = cur.fetchone()[0]
+    cur.execute(
+        "INSERT INTO feedback_changes (seq, feedback_id, op, payload) VALUES (%s, %s, %s, %s)",
+        (seq, feedback_id, op, json.dumps(payload, default=json_default) if payload is not None else None),
+    )
+    cur.close()
+    return seq
+
+def snapshot_feedback(conn, feedback_id: str):
+    """Lee la fila actual de feedback_events (dentro de la transacción) para el payload del cambio."""
+    cur = conn.cursor(dictionary=True, buffered=True)
+    cur.execute("SELECT * FROM feedback_events WHERE feedback_id = %s", (feedback_id,))
+    row = cur.fetchone()
+    cur.close()
+    return row
+
+def fetch_changes(cur, after: int, limit: int):
+    """
+    Devuelve hasta `limit` cambios con seq > after, en orden ascendente.
+    `cur` debe ser un cursor dictionary de una conexión con autocommit para
+    que cada lectura vea los cambios confirmados más recientes.
+    """
+    cur.execute(
+        """SELECT seq, feedback_id, op, payload, changed_at
+           FROM feedback_changes
+           WHERE seq > %s
+           ORDER BY seq
+           LIMIT %s
+        """,
+        (after, limit),
+    )
+    rows = cur.fetchall()
+    for r in rows:
+        p = r.pop("payload")
+        if isinstance(p, (bytes, bytearray)):
+            p = p.decode("utf-8")
+        r["data"] = json.loads(p) if p is not None else None
+        r["changed_at"] = json_default(r["changed_at"])
+    return rows
+
 # -----------------------------
 # Health / Version
 # -----------------------------
@@ -153,6 +221,49 @@ def list_feedback_events():
     except Exception as ex:
         return jsonify({"error": str(ex)}), 500
 
+# CHANGES – GET /feedback-events/changes?after=<seq>&limit=<n>&wait=<s> (long-poll)
+@app.get("/feedback-events/changes")
+def list_feedback_changes():
+    try:
+        q = request.args
+        try:
+            after = int(q.get("after", "0"))
+        except ValueError:
+            raise ValueError("after debe ser un entero")
+        if after < 0:
+            raise ValueError("after debe ser >= 0")
+        limit = max(1, min(q.get("limit", default=100, type=int), CHANGES_MAX_LIMIT))
+        wait = max(0.0, min(q.get("wait", default=0.0, type=float), CHANGES_MAX_WAIT_S))
+
+        # Una sola conexión (autocommit) para todo el long-poll
+        conn = get_db()
+        try:
+            conn.autocommit = True
+            cur = conn.cursor(dictionary=True)
+
+            # Espera hasta `wait` segundos a que aparezcan cambios nuevos
+            deadline = time.monotonic() + wait
+            rows = fetch_changes(cur, after, limit + 1)
+            while not rows and time.monotonic() < deadline:
+                time.sleep(CHANGES_POLL_INTERVAL_S)
+                rows = fetch_changes(cur, after, limit + 1)
+            cur.close()
+        finally:
+            conn.close()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_after = rows[-1]["seq"] if rows else after
+
+        return jsonify({"data": rows, "next_after": next_after, "has_more": has_more}), 200
+
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except mysql.connector.Error as me:
+        return jsonify({"error": f"MySQL error: {me}"}), 500
+    except Exception as ex:
+        return jsonify({"error": str(ex)}), 500
+
 # GET – /feedback-events/<feedback_id>
 @app.get("/feedback-events/<feedback_id>")
 def get_feedback_event(feedback_id):
@@ -214,11 +325,17 @@ def create_feedback_event():
         placeholders = ", ".join(["%s"] * len(cols))
 
         conn = get_db()
-        cur = conn.cursor()
-        cur.execute(f"INSERT INTO feedback_events ({', '.join(cols)}) VALUES ({placeholders})", vals)
-        conn.commit()
-        cur.close()
-        conn.close()
+        try:
+            cur = conn.cursor()
+            cur.execute(f"INSERT INTO feedback_events ({', '.join(cols)}) VALUES ({placeholders})", vals)
+            record_change(conn, fid, "insert", snapshot_feedback(conn, fid))
+            conn.commit()
+            cur.close()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
 
         return jsonify({"feedback_id": fid, "message": "Feedback event creado"}), 201
 
@@ -257,12 +374,19 @@ def update_feedback_event(feedback_id):
         params = list(updates.values()) + [feedback_id]
 
         conn = get_db()
-        cur = conn.cursor()
-        cur.execute(f"UPDATE feedback_events SET {sets} WHERE feedback_id = %s", params)
-        conn.commit()
-        affected = cur.rowcount
-        cur.close()
-        conn.close()
+        try:
+            cur = conn.cursor()
+            cur.execute(f"UPDATE feedback_events SET {sets} WHERE feedback_id = %s", params)
+            affected = cur.rowcount
+            if affected:
+                record_change(conn, feedback_id, "update", snapshot_feedback(conn, feedback_id))
+            conn.commit()
+            cur.close()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
 
         if affected == 0:
             return jsonify({"error": "Feedback event no encontrado"}), 404
@@ -281,12 +405,19 @@ def delete_feedback_event(feedback_id):
     try:
         feedback_id = ensure_uuid(feedback_id)
         conn = get_db()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM feedback_events WHERE feedback_id = %s", (feedback_id,))
-        conn.commit()
-        affected = cur.rowcount
-        cur.close()
-        conn.close()
+        try:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM feedback_events WHERE feedback_id = %s", (feedback_id,))
+            affected = cur.rowcount
+            if affected:
+                record_change(conn, feedback_id, "delete")
+            conn.commit()
+            cur.close()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
 
         if affected == 0:
             return jsonify({"error": "Feedback event no encontrado"}), 404
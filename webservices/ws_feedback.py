@@ -1,5 +1,7 @@
 from flask import Flask, request, jsonify
 import mysql.connector
+import json
+import time
 import uuid
 
 # Config de conexión (igual a tu ejemplo)
@@ -22,6 +24,11 @@ VALID_FEEDBACK = {"like", "dislike", "skip", "save", "share", "undo"}
 VALID_INTENT = {"maintain", "change"}
 VALID_EMOTION = {"joy", "sadness", "anger"}
 
+# --- Change feed (outbox feedback_changes + contador feedback_change_seq, ver app_feedback.py)
+CHANGES_MAX_LIMIT = 500
+CHANGES_MAX_WAIT_S = 30
+CHANGES_POLL_INTERVAL_S = 0.5
+
 def ensure_uuid(s):
     try:
         return str(uuid.UUID(str(s)))
@@ -38,6 +45,51 @@ def validate_enums(data):
     if "emotion" in data and data["emotion"] not in VALID_EMOTION:
         raise ValueError(f"emotion must be one of {sorted(VALID_EMOTION)}")
 
+# Fechas del change feed en ISO 8601
+def json_default(val):
+    if hasattr(val, "isoformat"):
+        return val.isoformat()
+    return str(val)
+
+# El lock sobre la fila de feedback_change_seq se mantiene hasta el commit,
+# así los seq se hacen visibles en orden (no hace commit).
+def record_change(conn, feedback_id, op, payload=None):
+    cur = conn.cursor(buffered=True)
+    cur.execute("UPDATE feedback_change_seq SET seq = LAST_INSERT_ID(seq + 1) WHERE id = 1")
+    cur.execute("SELECT LAST_INSERT_ID()")
+    seq = cur.fetchone()[0]
+    cur.execute(
+        "INSERT INTO feedback_changes (seq, feedback_id, op, payload) VALUES (%s, %s, %s, %s)",
+        (seq, feedback_id, op, json.dumps(payload, default=json_default) if payload is not None else None)
+    )
+    cur.close()
+    return seq
+
+def snapshot_feedback(conn, feedback_id):
+    cur = conn.cursor(dictionary=True, buffered=True)
+    cur.execute("SELECT * FROM feedback_events WHERE feedback_id = %s", (feedback_id,))
+    row = cur.fetchone()
+    cur.close()
+    return row
+
+# cur: cursor dictionary de una conexión con autocommit (cada lectura ve datos frescos)
+def fetch_changes(cur, after, limit):
+    cur.execute("""
+        SELECT seq, feedback_id, op, payload, changed_at
+        FROM feedback_changes
+        WHERE seq > %s
+        ORDER BY seq
+        LIMIT %s
+    """, (after, limit))
+    rows = cur.fetchall()
+    for r in rows:
+        p = r.pop("payload")
+        if isinstance(p, (bytes, bytearray)):
+            p = p.decode("utf-8")
+        r["data"] = json.loads(p) if p is not None else None
+        r["changed_at"] = json_default(r["changed_at"])
+    return rows
+
 # --- LIST (GET /feedback-events) con filtros y paginación
 @app.route("/feedback-events", methods=["GET"])
 def list_feedback_events():
@@ -98,6 +150,44 @@ def list_feedback_events():
     except Exception as ex:
         return jsonify({"error": str(ex)}), 500
 
+# --- CHANGES (GET /feedback-events/changes?after=<seq>&limit=<n>&wait=<s>) long-poll
+@app.route("/feedback-events/changes", methods=["GET"])
+def list_feedback_changes():
+    try:
+        try:
+            after = int(request.args.get("after", "0"))
+        except ValueError:
+            raise ValueError("after debe ser un entero")
+        if after < 0:
+            raise ValueError("after debe ser >= 0")
+        limit = max(1, min(request.args.get("limit", default=100, type=int), CHANGES_MAX_LIMIT))
+        wait = max(0.0, min(request.args.get("wait", default=0.0, type=float), CHANGES_MAX_WAIT_S))
+
+        conn = get_db_connection()
+        try:
+            conn.autocommit = True
+            cur = conn.cursor(dictionary=True)
+            deadline = time.monotonic() + wait
+            rows = fetch_changes(cur, after, limit + 1)
+            while not rows and time.monotonic() < deadline:
+                time.sleep(CHANGES_POLL_INTERVAL_S)
+                rows = fetch_changes(cur, after, limit + 1)
+            cur.close()
+        finally:
+            conn.close()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_after = rows[-1]["seq"] if rows else after
+        return jsonify({"data": rows, "next_after": next_after, "has_more": has_more}), 200
+
+    except ValueError as ve:
+        return jsonify({"error": str(ve)}), 400
+    except mysql.connector.Error as me:
+        return jsonify({"error": f"MySQL error: {str(me)}"}), 500
+    except Exception as ex:
+        return jsonify({"error": str(ex)}), 500
+
 # --- GET by id (GET /feedback-events/<feedback_id>)
 @app.route("/feedback-events/<feedback_id>", methods=["GET"])
 def get_feedback_event(feedback_id):
@@ -161,11 +251,17 @@ def create_feedback_event():
         sql = f"INSERT INTO feedback_events ({', '.join(cols)}) VALUES ({placeholders})"
 
         conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(sql, vals)
-        conn.commit()
-        cur.close()
-        conn.close()
+        try:
+            cur = conn.cursor()
+            cur.execute(sql, vals)
+            record_change(conn, feedback_id, "insert", snapshot_feedback(conn, feedback_id))
+            conn.commit()
+            cur.close()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
 
         return jsonify({"feedback_id": feedback_id, "message": "Feedback event creado"}), 201
 
@@ -212,12 +308,19 @@ def update_feedback_event(feedback_id):
         sql = f"UPDATE feedback_events SET {', '.join(sets)} WHERE feedback_id = %s"
 
         conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(sql, params)
-        conn.commit()
-        affected = cur.rowcount
-        cur.close()
-        conn.close()
+        try:
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            affected = cur.rowcount
+            if affected:
+                record_change(conn, feedback_id, "update", snapshot_feedback(conn, feedback_id))
+            conn.commit()
+            cur.close()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
 
         if affected == 0:
             return jsonify({"error": "Feedback event no encontrado"}), 404
@@ -236,12 +339,19 @@ def delete_feedback_event(feedback_id):
     try:
         feedback_id = ensure_uuid(feedback_id)
         conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM feedback_events WHERE feedback_id = %s", (feedback_id,))
-        conn.commit()
-        affected = cur.rowcount
-        cur.close()
-        conn.close()
+        try:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM feedback_events WHERE feedback_id = %s", (feedback_id,))
+            affected = cur.rowcount
+            if affected:
+                record_change(conn, feedback_id, "delete")
+            conn.commit()
+            cur.close()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
         if affected == 0:
             return jsonify({"error": "Feedback event no encontrado"}), 404
         return jsonify({"message": "Feedback event eliminado"}), 200